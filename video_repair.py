@@ -1,107 +1,970 @@
+"""
+Video Corruption Repair Tool: salvages corrupt or unplayable video files with FFmpeg.
+
+Re-encoding settings favour encoding speed over compression efficiency. The input of a repair is already
+lossy and damaged, so spending encoder time to preserve every last detail of it buys little; the fast
+'veryfast' preset at CRF 20 gives files about the size of 'medium' at CRF 23, 2-3x faster.
+
+How the libx264 presets differ in the settings that dominate encoding time:
+
+    preset     subme  ref  rc-lookahead
+    medium         7    3            40
+    faster         4    2            20
+    veryfast       2    1            10
+"""
+
 import subprocess
 import os
 import sys
+import shutil
+import pathlib
+import argparse
+import functools
+import asyncio
+import threading
+import ctypes
+
+# Linux only: fallocate(2) with FALLOC_FL_KEEP_SIZE reserves disk blocks for a file without changing its size.
+# (os.posix_fallocate cannot be used: it extends the file, so any unused reservation would end up as
+# trailing zeros in the repaired video.)
+FALLOC_FL_KEEP_SIZE = 0x01
+libc_fallocate = None
+if sys.platform.startswith('linux'):
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        libc = None
+    # fallocate64 takes 64-bit offsets on every glibc. Plain fallocate only does on 64-bit builds;
+    # on 32-bit ones (i386, armhf) it takes a 32-bit off_t and would receive garbage sizes.
+    libc_fallocate = getattr(libc, 'fallocate64', None)
+    if libc_fallocate is None and ctypes.sizeof(ctypes.c_void_p) == 8:
+        libc_fallocate = getattr(libc, 'fallocate', None)
+    if libc_fallocate is not None:
+        libc_fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+        libc_fallocate.restype = ctypes.c_int
 
 # --- Configuration ---
 # You must have FFmpeg installed and accessible in your system's PATH.
+# It is resolved once here, so later calls skip the PATH search (None if FFmpeg is not installed).
+FFMPEG = shutil.which('ffmpeg')
+
+# Repair strategies, from cheapest to most aggressive:
+#   remux:    Stream copy into a fresh container. Takes seconds and fixes broken headers/index tables (moov atom).
+#   reencode: Re-encode the video (and, if needed, the audio). Slow, rebuilds the streams from decodable frames.
+#   extreme:  Re-encode while discarding corrupt packets and ignoring decode errors. Last resort.
+#   auto:     Try remux first and only escalate to reencode, then extreme, when the cheaper step fails.
+REPAIR_MODES = ('auto', 'remux', 'reencode', 'extreme')
+
+# Upper bound (in seconds) for the remux probe in 'auto' mode. A stream copy is I/O bound, so anything
+# slower than this means FFmpeg is stuck on the damaged file and re-encoding is the better bet.
+REMUX_PROBE_TIMEOUT = 600
+
+# In 'auto' mode, a remux whose output is smaller than this fraction of the input is treated as a failure
+# (FFmpeg often "succeeds" on a damaged file but only copies the first few seconds).
+REMUX_MIN_SIZE_RATIO = 0.5
+
+# Batch mode: video files picked up when a directory is given, and the FFmpeg threads per job.
+# x264 at the fast presets stops scaling at around 6-8 threads per stream, so several narrower
+# jobs side by side keep a many-core machine busier than one wide job at a time.
+BATCH_EXTENSIONS = ('.mp4', '.mov', '.mkv')
+BATCH_THREADS_PER_JOB = 4
+
+# Disk space reserved for the output before FFmpeg starts, as a fraction of the input size. Reserving it
+# in one go lets the filesystem hand out large contiguous extents instead of growing the file chunk by chunk.
+PREALLOCATE_RATIO = 1.1
+
+# Extensions of raw (container-less) H.264 elementary streams. Only these are forced through the raw H.264 demuxer;
+# parsing an MP4/MOV/MKV container as raw NAL units just wastes time and produces a tiny, useless output.
+RAW_H264_EXTENSIONS = ('.h264', '.264', '.bin')
+
+# Output extensions written by FFmpeg's MP4/MOV muxer, the only ones that take '-movflags'.
+MOVFLAGS_EXTENSIONS = ('.mp4', '.mov')
+
+# FFmpeg's log is forwarded in chunks of up to LOG_CHUNK_SIZE bytes as they arrive, and the last
+# LOG_TAIL_SIZE bytes are kept to check why a run failed.
+LOG_CHUNK_SIZE = 64 * 1024
+LOG_TAIL_SIZE = 64 * 1024
+
+# --- Hardware Acceleration ---
+# Hardware H.264 encoders, in the order '--hwaccel auto' tries them.
+# Each one is only used if this FFmpeg build lists it in 'ffmpeg -encoders' and a test encode with it succeeds.
+HWACCEL_ENCODERS = {
+    'cuda': 'h264_nvenc',
+    'vaapi': 'h264_vaapi',
+    'qsv': 'h264_qsv',
+    'videotoolbox': 'h264_videotoolbox',
+}
+
+# Upper bound (in seconds) for that test encode, in case a broken driver hangs.
+HWACCEL_TEST_TIMEOUT = 30
+
+@functools.lru_cache(maxsize=1)
+def available_encoders():
+    """Returns the output of 'ffmpeg -encoders', probed once per process."""
+    if FFMPEG is None:
+        return ""
+    result = subprocess.run(
+        [FFMPEG, '-hide_banner', '-encoders'],
+        capture_output=True,
+        text=True,
+        check=False
+    )
+    return result.stdout
+
+@functools.lru_cache(maxsize=None)
+def encoder_works(hwaccel):
+    """
+    Runs a one-frame test encode to check that the accelerator's device is actually usable, once per process.
+    'ffmpeg -encoders' only shows what the build was compiled with: stock Linux builds list NVENC, VAAPI and
+    QSV even on machines without a matching GPU.
+
+    Args:
+        hwaccel (str): One of the HWACCEL_ENCODERS keys.
+
+    Returns:
+        bool: True if the test encode succeeded.
+    """
+    # -f lavfi -i nullsrc: A generated blank input, no file needed
+    # -frames:v 1: Encode a single frame, enough to open the device
+    # -f null -: Discard the output
+    input_args, video_args = hwaccel_arguments(hwaccel)
+    command = [
+        FFMPEG,
+        '-v', 'error',
+        *input_args,
+        '-f', 'lavfi',
+        '-i', 'nullsrc=s=256x256',
+        '-frames:v', '1',
+        *video_args,
+        '-f', 'null',
+        '-'
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=HWACCEL_TEST_TIMEOUT,
+            check=False
+        )
+    except subprocess.TimeoutExpired:
+        return False
+    return result.returncode == 0
 
-def repair_video(input_path):
+# select_hwaccel() runs in worker threads (see repair_async()). Batch jobs that get there at the same time
+# wait for the first one's result instead of repeating the test encodes and warnings.
+hwaccel_lock = threading.Lock()
+
+def select_hwaccel(hwaccel='auto'):
+    """
+    Resolves the --hwaccel choice to a usable accelerator. Cached, so a batch prints any warning only once.
+
+    Args:
+        hwaccel (str): One of 'auto', 'cuda', 'vaapi', 'qsv', 'videotoolbox' or 'none'.
+
+    Returns:
+        str or None: The accelerator to use, or None for the CPU (libx264) path.
+    """
+    with hwaccel_lock:
+        return resolve_hwaccel(hwaccel)
+
+@functools.lru_cache(maxsize=None)
+def resolve_hwaccel(hwaccel):
+    """Does the work of select_hwaccel(), without the lock."""
+    if hwaccel == 'none':
+        return None
+
+    encoders = available_encoders()
+
+    if hwaccel != 'auto':
+        if HWACCEL_ENCODERS[hwaccel] in encoders and encoder_works(hwaccel):
+            return hwaccel
+        print(f"Warning: '{HWACCEL_ENCODERS[hwaccel]}' is not available on this machine. Falling back to CPU encoding.")
+        return None
+
+    for candidate, encoder in HWACCEL_ENCODERS.items():
+        # VAAPI is Linux-only and VideoToolbox is macOS-only.
+        if candidate == 'vaapi' and not sys.platform.startswith('linux'):
+            continue
+        if candidate == 'videotoolbox' and sys.platform != 'darwin':
+            continue
+        if encoder in encoders and encoder_works(candidate):
+            return candidate
+    return None
+
+def hwaccel_arguments(hwaccel, preset='veryfast', crf=20, low_latency=False):
+    """
+    Builds the FFmpeg arguments for the chosen accelerator.
+
+    Args:
+        hwaccel (str or None): The accelerator returned by select_hwaccel().
+        preset (str): libx264 preset for the CPU path.
+        crf (int): libx264 Constant Rate Factor for the CPU path.
+        low_latency (bool): Add zerolatency tuning and sliced threads on the CPU path.
+
+    Returns:
+        tuple: (input_args, video_args). input_args go before '-i', video_args replace the video encoder settings.
+    """
+    # -hwaccel cuda -hwaccel_output_format cuda: Decode on the GPU and keep frames in VRAM for NVENC
+    # -preset p5 -tune hq: NVENC quality preset, roughly comparable to libx264 'medium'
+    # -rc vbr -cq 23 -b:v 0: Constant-quality rate control, the NVENC counterpart of '-crf 23'
+    if hwaccel == 'cuda':
+        return (
+            ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'],
+            ['-c:v', 'h264_nvenc', '-preset', 'p5', '-tune', 'hq', '-rc', 'vbr', '-cq', '23', '-b:v', '0']
+        )
+    # -vaapi_device: The render node used by the VAAPI encoder (Intel/AMD GPUs on Linux)
+    # -vf format=nv12|vaapi,hwupload: Upload any frames that were decoded in software to the GPU
+    if hwaccel == 'vaapi':
+        return (
+            ['-vaapi_device', '/dev/dri/renderD128', '-hwaccel', 'vaapi', '-hwaccel_output_format', 'vaapi'],
+            ['-vf', 'format=nv12|vaapi,hwupload', '-c:v', 'h264_vaapi', '-qp', '23']
+        )
+    # -global_quality 23: Intel Quick Sync constant-quality mode
+    if hwaccel == 'qsv':
+        return (
+            [],
+            ['-c:v', 'h264_qsv', '-preset', 'medium', '-global_quality', '23']
+        )
+    # -b:v 8M: VideoToolbox has no CRF mode on every Mac, so use a generous fixed bitrate
+    if hwaccel == 'videotoolbox':
+        return (
+            ['-hwaccel', 'videotoolbox'],
+            ['-c:v', 'h264_videotoolbox', '-b:v', '8M']
+        )
+    # CPU fallback
+    # -c:v libx264: Force video re-encoding to H.264 (robust standard)
+    # -preset veryfast: A fraction of 'medium's encoding time (see the preset table at the top of this file)
+    # -crf 20: A slightly lower CRF than the usual 23 makes up for the faster preset, at about the same file size
+    # -tune fastdecode: Disables CABAC, deblocking and weighted prediction. Encodes faster and the repaired
+    #                   copy plays back on weak decoders, at the cost of a somewhat larger file
+    video_args = ['-c:v', 'libx264', '-preset', preset, '-crf', str(crf)]
+    tunes = ['fastdecode']
+
+    # -tune zerolatency: No frame lookahead buffering, which also disables B-frames (larger output files)
+    #                    but cuts the memory held in buffered frames by about two thirds on long inputs
+    # -x264-params sliced-threads=1: Split each frame across threads instead of encoding several frames at once,
+    #                                lower latency and memory use at a small cost in compression efficiency
+    extra_args = []
+    if low_latency:
+        tunes.append('zerolatency')
+        extra_args = ['-x264-params', 'sliced-threads=1']
+
+    video_args += ['-tune', ','.join(tunes), *extra_args]
+    return ([], video_args)
+
+# --- FFmpeg Commands ---
+
+def output_path_for(input_path, mode):
     """
-    Attempts to repair a video file by using FFmpeg to remux and copy streams.
-    This often fixes issues related to broken headers or index tables.
+    Determines where the repaired copy of input_path is written.
 
     Args:
         input_path (str): The full path to the potentially corrupt video file.
+        mode (str): The repair mode ('remux', 'reencode' or 'extreme').
+
+    Returns:
+        str: The output path, e.g. video.mp4 -> video_noncorrupt.mp4
     """
-    # 1. Check if the input file exists
-    if not os.path.exists(input_path):
-        print(f"Error: The file '{input_path}' was not found.")
-        return
+    path = pathlib.Path(input_path)
 
-    # 2. Determine the output path
-    # Get the directory, base filename, and extension
-    directory = os.path.dirname(input_path)
-    filename_without_ext, extension = os.path.splitext(os.path.basename(input_path))
+    # The extreme repair always creates an MP4 container, so force the extension to match. The original
+    # extension is kept in front of it (video.mkv -> video_noncorrupt.mkv.mp4), so video.mp4 and video.mkv
+    # in the same folder never share an output file.
+    extension = path.suffix
+    if mode == 'extreme' and extension.lower() != '.mp4':
+        extension += '.mp4'
 
-    # Construct the new filename
-    output_filename = f"{filename_without_ext}_noncorrupt{extension}"
-    output_path = os.path.join(directory, output_filename)
+    return os.fspath(path.with_name(f"{path.stem}_noncorrupt{extension}"))
 
-    print("-" * 50)
-    print(f"Input file: {input_path}")
-    print(f"Output file will be saved as: {output_path}")
-    print("Attempting repair using FFmpeg (This may take a few moments)...")
-    print("-" * 50)
+def partial_path_for(output_path):
+    """
+    Returns the temporary path FFmpeg writes to before the result is renamed to output_path.
+    The '.part' marker goes before the extension so FFmpeg still picks the right container from it,
+    e.g. video_noncorrupt.mp4 -> video_noncorrupt.part.mp4
+    """
+    path = pathlib.Path(output_path)
+    return os.fspath(path.with_name(f"{path.stem}.part{path.suffix}"))
 
-    # 3. Construct the FFmpeg command
+def remux_command(input_path, output_path, streamable=False, threads=None, **encode_options):
+    """
+    Builds the FFmpeg command for a stream-copy repair (no re-encoding). See repair_async() for the arguments.
+    Encoder options (hwaccel, preset, ...) are accepted so all modes share one signature, and ignored.
+    """
     # -i: Input file
+    # -threads: One thread per CPU core, unless a thread count is given (batch mode)
     # -c copy: Copy the existing video and audio streams without re-encoding (faster)
-    # -movflags faststart: Optimizes file structure for web streaming (good practice)
-    # -map 0:0 -map 0:1: Explicitly map the first video and audio stream (optional, but robust)
-    
-    # We use 'copy' to preserve quality and speed up the process.
-    # If a deeper repair (re-encoding) is needed, you might replace '-c copy'
-    # with '-c:v libx264 -preset fast -crf 23 -c:a aac -b:a 128k'
-
-    command = [
-        'ffmpeg',
+    # -movflags: MP4/MOV layout, see movflags_arguments()
+    # -truncate 0: Keep the disk space reserved for the output, see preallocation_arguments()
+    # -y: Overwrite output file without asking
+    return [
+        FFMPEG,
         '-i', input_path,
+        '-threads', str(threads or os.cpu_count() or 1),
         '-c', 'copy',
-        '-movflags', 'faststart',
-        '-y',  # Overwrite output file without asking
+        *movflags_arguments(output_path, streamable),
+        *preallocation_arguments(),
+        '-y',
+        output_path
+    ]
+
+def reencode_command(input_path, output_path, hwaccel=None, preset='veryfast', crf=20, low_latency=False,
+                     reencode_audio=False, streamable=False, threads=None):
+    """
+    Builds the FFmpeg command for a re-encoding repair. See repair_async() for the arguments,
+    except hwaccel: the accelerator already resolved by select_hwaccel() (None for the CPU).
+    """
+    # Hardware decode flags (if any) go before the input, the encoder settings come from hwaccel_arguments()
+    # -i: Input file
+    # -threads: Bound the encoder to one thread per CPU core (or the given count) so it does not oversubscribe the machine
+    # -c:a copy: Keep the (usually intact) audio stream as-is, no lossy second generation
+    # -c:a aac -b:a 128k: Re-encode audio to AAC at 128 kbps (reencode_audio, or when copying is not possible)
+    # -movflags: MP4/MOV layout, see movflags_arguments()
+    # -truncate 0: Keep the disk space reserved for the output, see preallocation_arguments()
+    # -y: Overwrite output file without asking
+    input_args, video_args = hwaccel_arguments(hwaccel, preset, crf, low_latency)
+
+    return [
+        FFMPEG,
+        *input_args,
+        '-i', input_path,
+        '-threads', str(threads or os.cpu_count() or 1),
+        *video_args,
+        *audio_arguments(reencode_audio),
+        *movflags_arguments(output_path, streamable),
+        *preallocation_arguments(),
+        '-y',
+        output_path
+    ]
+
+def extreme_command(input_path, output_path, hwaccel=None, preset='veryfast', crf=20, low_latency=False,
+                    reencode_audio=False, streamable=False, threads=None):
+    """Builds the FFmpeg command for the last-resort repair. Takes the same arguments as reencode_command()."""
+    # -fflags +discardcorrupt+genpts+igndts: Drop corrupt packets, regenerate missing timestamps and ignore broken DTS
+    # -err_detect ignore_err: Keep decoding past stream errors instead of aborting
+    # -analyzeduration 100M -probesize 100M: Read further into the file to find usable stream parameters
+    # -f h264: Only for raw elementary streams, forces input interpretation as a raw H.264 video stream.
+    # Everything after '-i' matches reencode_command()
+    input_args, video_args = hwaccel_arguments(hwaccel, preset, crf, low_latency)
+
+    if pathlib.Path(input_path).suffix.lower() in RAW_H264_EXTENSIONS:
+        raw_input_args = ['-f', 'h264']
+    else:
+        raw_input_args = []
+
+    return [
+        FFMPEG,
+        *input_args,
+        '-fflags', '+discardcorrupt+genpts+igndts',
+        '-err_detect', 'ignore_err',
+        '-analyzeduration', '100M',
+        '-probesize', '100M',
+        *raw_input_args,
+        '-i', input_path,
+        '-threads', str(threads or os.cpu_count() or 1),
+        *video_args,
+        *audio_arguments(reencode_audio),
+        *movflags_arguments(output_path, streamable),
+        *preallocation_arguments(),
+        '-y',
         output_path
     ]
 
-    # 4. Execute the FFmpeg command
+def audio_arguments(reencode_audio):
+    """Returns the audio codec arguments: stream copy by default, AAC when reencode_audio is set."""
+    if reencode_audio:
+        return ['-c:a', 'aac', '-b:a', '128k']
+    return ['-c:a', 'copy']
+
+def movflags_arguments(output_path, streamable):
+    """
+    Returns the MP4 muxer flags, or nothing for other containers (e.g. MKV), which do not use them.
+
+    Args:
+        output_path (str): Where FFmpeg writes the output; its extension selects the container.
+        streamable (bool): Put the index (moov atom) at the front of a regular MP4 for progressive web playback.
+
+    Returns:
+        list: The '-movflags' arguments.
+    """
+    if pathlib.Path(output_path).suffix.lower() not in MOVFLAGS_EXTENSIONS:
+        return []
+
+    # +faststart: FFmpeg writes the whole file, then rewrites all of it to move the moov atom to the front.
+    #             That second pass doubles the bytes written, which hurts on multi-gigabyte repairs.
+    if streamable:
+        return ['-movflags', '+faststart']
+    # +frag_keyframe+empty_moov+default_base_moof: Fragmented MP4 written in a single pass, with no rewrite.
+    #             Plays in all common players; only very old ones require a regular (non-fragmented) MP4.
+    return ['-movflags', '+frag_keyframe+empty_moov+default_base_moof']
+
+def preallocation_arguments():
+    """
+    Returns the FFmpeg arguments that keep a disk space reservation made by reserve_output().
+    FFmpeg normally truncates its output file on open, which would release the reserved blocks.
+    """
+    if libc_fallocate is None:
+        return []
+    return ['-truncate', '0']
+
+# FFmpeg command builder for each repair mode ('auto' runs them in this order).
+COMMAND_BUILDERS = {
+    'remux': remux_command,
+    'reencode': reencode_command,
+    'extreme': extreme_command,
+}
+
+# --- Execution ---
+# FFmpeg runs under asyncio: one Python thread supervises every FFmpeg child and drains its log as data
+# arrives, so batch mode needs no polling thread per running repair.
+
+def write_log(data):
+    """
+    Copies FFmpeg log output (bytes) to our stderr without decoding it.
+
+    Args:
+        data (bytes): Raw log output from an FFmpeg stderr pipe.
+    """
+    stream = getattr(sys.stderr, 'buffer', None)
+    if stream is None:
+        # stderr was replaced by a text-only stream (e.g. in an IDE console)
+        sys.stderr.write(data.decode(errors='replace'))
+        return
+    stream.write(data)
+    stream.flush()
+
+def reserve_output(command):
+    """
+    Creates the output file of an FFmpeg command and reserves disk space for it (Linux only).
+    Only acts on commands built with preallocation_arguments(). The file is emptied here because
+    FFmpeg has been told not to truncate it, so nothing from an earlier attempt can survive.
+
+    Args:
+        command (list): The full FFmpeg command line; its last element is the output path.
+    """
+    if '-truncate' not in command:
+        return
+
+    input_path = command[command.index('-i') + 1]
+    size = int(os.path.getsize(input_path) * PREALLOCATE_RATIO)
+
+    fd = os.open(command[-1], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
     try:
-        # We run the command and capture/stream output to the console
-        process = subprocess.Popen(
-            command,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
+        # Best effort: some filesystems (e.g. tmpfs on old kernels, network mounts) do not support it.
+        if libc_fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, size) != 0:
+            print(f"Note: Could not reserve disk space for the output ({os.strerror(ctypes.get_errno())}). Continuing without it.")
+    finally:
+        os.close(fd)
 
-        # Print FFmpeg output in real-time
-        for line in process.stderr:
-            sys.stderr.write(line)
+def release_output(command):
+    """Frees the part of reserve_output()'s reservation that FFmpeg did not use."""
+    output_path = command[-1]
+    if '-truncate' in command and os.path.exists(output_path):
+        # Truncating to the current size drops the preallocated blocks past the end of the file.
+        os.truncate(output_path, os.path.getsize(output_path))
 
-        process.wait()
+async def run_ffmpeg_async(command):
+    """
+    Runs an FFmpeg command, streaming its log output (stderr) to the console.
 
-        if process.returncode == 0:
-            print("-" * 50)
-            print(f"✅ Success: Video successfully processed and saved to:\n{output_path}")
-            print("Please check the new file for playback issues.")
-            print("-" * 50)
-        else:
-            print("-" * 50)
-            print(f"❌ Error: FFmpeg failed to process the file (Return Code: {process.returncode}).")
-            print("Check the output above for FFmpeg error messages.")
-            print("This type of corruption may not be fixable.")
-            print("-" * 50)
-
-    except FileNotFoundError:
-        print("-" * 50)
+    Args:
+        command (list): The full FFmpeg command line.
+
+    Returns:
+        tuple: (returncode, log_tail). log_tail holds the last LOG_TAIL_SIZE bytes FFmpeg printed, for error detection.
+    """
+    reserve_output(command)
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    # Read fixed-size chunks rather than lines: FFmpeg's '\r'-terminated progress updates would otherwise
+    # pile up into one ever-growing "line" that overflows the stream reader's buffer on long encodes.
+    log_tail = b""
+    try:
+        while True:
+            chunk = await process.stderr.read(LOG_CHUNK_SIZE)
+            if not chunk:
+                break
+            write_log(chunk)
+            log_tail = (log_tail + chunk)[-LOG_TAIL_SIZE:]
+        await process.wait()
+    finally:
+        # On an error or cancellation, do not leave FFmpeg running (and stalling on a full stderr pipe)
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        release_output(command)
+
+    return process.returncode, log_tail.decode(errors='replace')
+
+def audio_retry_command(command, log_tail, reencode_audio=False):
+    """
+    Checks whether a failed encode should be retried with AAC audio.
+    Copying fails when the output container has no tag for the audio codec (e.g. PCM in MP4).
+
+    Args:
+        command (list): The FFmpeg command that failed, containing '-c:a copy' unless reencode_audio is set.
+        log_tail (str): The last lines FFmpeg printed.
+        reencode_audio (bool): Whether the command already re-encodes audio.
+
+    Returns:
+        list or None: The command with audio re-encoded to AAC, or None if a retry would not help.
+    """
+    if reencode_audio or 'could not find tag for codec' not in log_tail.lower():
+        return None
+
+    print("-" * 70)
+    print("The audio stream cannot be copied into this container. Retrying with AAC audio re-encoding...")
+    print("-" * 70)
+    audio_index = command.index('-c:a')
+    return command[:audio_index] + ['-c:a', 'aac', '-b:a', '128k'] + command[audio_index + 2:]
+
+async def run_with_audio_fallback_async(command, reencode_audio=False):
+    """
+    Runs an encoding command, retrying once with AAC audio if the copied audio codec is rejected.
+
+    Args:
+        command (list): The full FFmpeg command line, containing '-c:a copy' unless reencode_audio is set.
+        reencode_audio (bool): Whether the command already re-encodes audio.
+
+    Returns:
+        int: FFmpeg's return code.
+    """
+    returncode, log_tail = await run_ffmpeg_async(command)
+
+    if returncode != 0:
+        retry_command = audio_retry_command(command, log_tail, reencode_audio)
+        if retry_command:
+            returncode, log_tail = await run_ffmpeg_async(retry_command)
+
+    return returncode
+
+def probe_command(input_path, output_path, streamable=False, threads=None):
+    """Builds the remux command for the 'auto' mode probe. See remux_command() for the arguments."""
+    # -v error: Only print real errors, the probe is expected to fail on badly damaged files
+    command = remux_command(input_path, output_path, streamable, threads)
+    command[1:1] = ['-v', 'error']
+    return command
+
+def probe_succeeded(input_path, output_path, returncode):
+    """
+    Decides whether the 'auto' mode remux probe produced a usable file.
+
+    Args:
+        input_path (str): The full path to the potentially corrupt video file.
+        output_path (str): Where the remuxed copy was written.
+        returncode (int or None): FFmpeg's return code, or None if the probe timed out.
+
+    Returns:
+        bool: True if the remux produced a plausibly complete file.
+    """
+    return (
+        returncode == 0
+        and os.path.exists(output_path)
+        and os.path.getsize(output_path) > REMUX_MIN_SIZE_RATIO * os.path.getsize(input_path)
+    )
+
+async def probe_remux_async(input_path, output_path, streamable=False, threads=None):
+    """
+    Runs a quiet, time-bounded stream copy as the first step of 'auto' mode.
+
+    Args:
+        input_path (str): The full path to the potentially corrupt video file.
+        output_path (str): Where the remuxed copy is written.
+        streamable (bool): See repair_async().
+        threads (int): See repair_async().
+
+    Returns:
+        bool: True if the remux produced a plausibly complete file.
+    """
+    command = probe_command(input_path, output_path, streamable, threads)
+    reserve_output(command)
+
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), REMUX_PROBE_TIMEOUT)
+        write_log(stderr)
+        returncode = process.returncode
+    except asyncio.TimeoutError:
+        print(f"Remux did not finish within {REMUX_PROBE_TIMEOUT} seconds.")
+        returncode = None
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        release_output(command)
+
+    return probe_succeeded(input_path, output_path, returncode)
+
+# --- Repair ---
+
+def check_prerequisites(input_path):
+    """Reports whether FFmpeg is installed and input_path is an existing file, printing an error if not."""
+    if FFMPEG is None:
+        print("-" * 70)
         print("❌ CRITICAL ERROR: FFmpeg command not found.")
         print("Please ensure FFmpeg is installed and added to your system's PATH.")
-        print("-" * 50)
+        print("-" * 70)
+        return False
+
+    if not pathlib.Path(input_path).is_file():
+        print(f"Error: The file '{input_path}' was not found.")
+        return False
+
+    return True
+
+def check_output_path(input_path, output_path):
+    """
+    Reports whether output_path can be written without touching the input, printing an error if not.
+    Checked before FFmpeg starts, so a long encode cannot end in a permission error or overwrite its own input.
+    """
+    output_directory = os.path.dirname(output_path) or '.'
+    if not os.access(output_directory, os.W_OK):
+        print(f"Error: No permission to write to '{output_directory}'. Cannot proceed.")
+        return False
+
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        print("Error: Input and output paths are identical. Cannot proceed.")
+        return False
+
+    return True
+
+def finish_output(partial_path, output_path, succeeded):
+    """
+    Moves a successful result into place, or removes the partial file of a failed attempt.
+    The rename is atomic, so output_path only ever holds a complete repair, never a truncated one
+    left behind by a killed or failed FFmpeg run.
+
+    Returns:
+        bool: succeeded, unchanged.
+    """
+    if succeeded:
+        os.replace(partial_path, output_path)
+    elif os.path.exists(partial_path):
+        os.remove(partial_path)
+    return succeeded
+
+def existing_output(input_path, stages):
+    """
+    Returns an earlier repair of input_path that is newer than the input, or None if there is none.
+    Only the paths output_path_for() gives this input are checked. They are unique per source file,
+    so the repair of a sibling with another extension (video.mp4 next to video.mkv) never counts.
+    """
+    for stage in stages:
+        output_path = output_path_for(input_path, stage)
+        if os.path.exists(output_path) and os.path.getmtime(output_path) > os.path.getmtime(input_path):
+            return output_path
+    return None
+
+def repair_stages(mode):
+    """Returns the repair modes to try, in order, for the given --mode."""
+    return list(COMMAND_BUILDERS) if mode == 'auto' else [mode]
+
+def print_stage_banner(stage, input_path, output_path, hwaccel=None):
+    """Announces the repair stage that is about to run, and for re-encoding stages the video encoder it uses."""
+    print("-" * 70)
+    print(f"Input file: {input_path}")
+    print(f"Output file will be saved as: {output_path}")
+    if stage == 'remux':
+        print("Attempting repair using FFmpeg stream copy (This may take a few moments)...")
+    elif stage == 'reencode':
+        print("Attempting repair using FFmpeg (THIS IS A SLOW RE-ENCODING PROCESS)...")
+    else:
+        print("Attempting EXTREME-RESORT repair: Discarding corrupt packets + ignoring decode errors...")
+    if stage != 'remux':
+        print(f"Video encoder: {HWACCEL_ENCODERS.get(hwaccel, 'libx264')}")
+    print("-" * 70)
+
+def build_command(stage, input_path, output_path, **encode_options):
+    """Builds the FFmpeg command for a repair mode ('remux', 'reencode' or 'extreme')."""
+    return COMMAND_BUILDERS[stage](input_path, output_path, **encode_options)
+
+def encode_succeeded(output_path, returncode):
+    """Reports whether a repair stage produced a non-empty file."""
+    return returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+def print_stage_result(stage, stages, output_path, succeeded):
+    """Prints the outcome of a repair stage: success, escalation to the next stage, or final failure."""
+    if succeeded:
+        print("-" * 70)
+        print(f"✅ Success: Video successfully processed and saved to:\n{output_path}")
+        if stage == 'extreme':
+            print("The quality of the recovered video may be degraded. Please check the new file for playback issues.")
+        else:
+            print("Please check the new file for playback issues.")
+        print("-" * 70)
+    elif stage != stages[-1]:
+        print(f"The '{stage}' repair did not produce a usable file. Escalating to a more aggressive repair...")
+    else:
+        print("-" * 70)
+        print("❌ Error: FFmpeg failed to process the file.")
+        print("Check the output above for FFmpeg error messages.")
+        print("This type of corruption may not be fixable.")
+        print("-" * 70)
+
+async def repair_async(input_path, mode='auto', hwaccel='auto', preset='veryfast', crf=20, low_latency=False,
+                       reencode_audio=False, streamable=False, threads=None, skip_existing=False):
+    """
+    Attempts to repair a video file with FFmpeg.
+    In 'auto' mode a cheap stream copy is tried first, which fixes most broken headers or index tables
+    in seconds; the slow re-encoding repairs only run when that fails.
+
+    Args:
+        input_path (str): The full path to the potentially corrupt video file.
+        mode (str): 'auto', 'remux', 'reencode' or 'extreme' (see REPAIR_MODES).
+        hwaccel (str): Hardware encoder to use ('auto', 'cuda', 'vaapi', 'qsv', 'videotoolbox' or 'none').
+        preset (str): libx264 preset used when encoding on the CPU (default 'veryfast').
+        crf (int): libx264 Constant Rate Factor used when encoding on the CPU (default 20).
+        low_latency (bool): Trade file size for lower latency and memory on the CPU path. Worth it for very
+                            long corrupted files: zerolatency keeps about a third of the frames in memory,
+                            but it disables B-frames, so the output will be noticeably larger.
+        reencode_audio (bool): Always re-encode audio to AAC. By default the audio stream is copied as-is,
+                               with an automatic AAC retry if the container cannot hold the original codec.
+        streamable (bool): Write a regular MP4 with the index at the front (+faststart), ready for web streaming.
+                           This costs a second full pass over the output. By default a fragmented MP4 is written
+                           in one pass instead, halving the bytes written to disk.
+        threads (int): FFmpeg threads for this job. Defaults to one per CPU core.
+        skip_existing (bool): Do nothing if a repaired copy newer than the input already exists.
+
+    Returns:
+        str or None: The path of the repaired file, or None if the repair failed.
+    """
+    # 1. Check that FFmpeg is available and the input file exists
+    if not check_prerequisites(input_path):
+        return None
+
+    encode_options = {
+        'hwaccel': None,
+        'preset': preset,
+        'crf': crf,
+        'low_latency': low_latency,
+        'reencode_audio': reencode_audio,
+        'streamable': streamable,
+        'threads': threads,
+    }
+    stages = repair_stages(mode)
+
+    if skip_existing:
+        output_path = existing_output(input_path, stages)
+        if output_path:
+            print(f"Skipping '{input_path}': already repaired as '{output_path}'.")
+            return output_path
+
+    hwaccel_resolved = False
+    try:
+        for stage in stages:
+            # 2. Determine the output path
+            output_path = output_path_for(input_path, stage)
+            if not check_output_path(input_path, output_path):
+                return None
+
+            # Resolve the hardware encoder once, on the first re-encoding stage, so a successful remux never waits
+            # for the test encodes. They block, so they run in a worker thread while other batch jobs carry on.
+            if stage != 'remux' and not hwaccel_resolved:
+                loop = asyncio.get_running_loop()
+                encode_options['hwaccel'] = await loop.run_in_executor(None, select_hwaccel, hwaccel)
+                hwaccel_resolved = True
+            print_stage_banner(stage, input_path, output_path, encode_options['hwaccel'])
+
+            # 3. Construct and execute the FFmpeg command, writing to a temporary file until it succeeds
+            partial_path = partial_path_for(output_path)
+            succeeded = False
+            try:
+                if stage == 'remux' and mode == 'auto':
+                    succeeded = await probe_remux_async(input_path, partial_path, streamable, threads)
+                elif stage == 'remux':
+                    returncode, _ = await run_ffmpeg_async(build_command(stage, input_path, partial_path, **encode_options))
+                    succeeded = encode_succeeded(partial_path, returncode)
+                else:
+                    command = build_command(stage, input_path, partial_path, **encode_options)
+                    returncode = await run_with_audio_fallback_async(command, reencode_audio)
+                    if returncode != 0 and encode_options['hwaccel']:
+                        # The GPU can still reject a particular input (e.g. an unsupported pixel format),
+                        # so retry on the CPU, and stay there for any later stage
+                        print("-" * 70)
+                        print("Hardware encoding failed. Retrying with CPU encoding (libx264)...")
+                        print("-" * 70)
+                        encode_options['hwaccel'] = None
+                        command = build_command(stage, input_path, partial_path, **encode_options)
+                        returncode = await run_with_audio_fallback_async(command, reencode_audio)
+                    succeeded = encode_succeeded(partial_path, returncode)
+            finally:
+                # Also runs on errors, so a failed or interrupted attempt never leaves its partial file behind
+                finish_output(partial_path, output_path, succeeded)
+
+            print_stage_result(stage, stages, output_path, succeeded)
+            if succeeded:
+                return output_path
+
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+    return None
+
+def repair_video(input_path, mode='auto', hwaccel='auto', preset='veryfast', crf=20, low_latency=False,
+                 reencode_audio=False, streamable=False, threads=None, skip_existing=False):
+    """
+    Repairs a single video file. Runs repair_async() to completion; see there for the arguments.
+
+    Returns:
+        str or None: The path of the repaired file, or None if the repair failed.
+    """
+    return asyncio.run(repair_async(
+        input_path, mode, hwaccel, preset, crf, low_latency, reencode_audio, streamable, threads, skip_existing
+    ))
+
+# --- Batch Repair ---
+
+def find_videos(directory):
+    """
+    Lists the video files in a directory for batch repair.
+
+    Args:
+        directory (str): The directory to scan (not recursive).
+
+    Returns:
+        list: Paths of files with a BATCH_EXTENSIONS extension, skipping outputs of earlier repairs.
+    """
+    return [
+        os.fspath(path)
+        for path in sorted(pathlib.Path(directory).iterdir())
+        if path.is_file()
+        and path.suffix.lower() in BATCH_EXTENSIONS
+        and '_noncorrupt.' not in path.name
+    ]
+
+async def repair_many_async(paths, workers=None, **options):
+    """Async counterpart of repair_many(). Takes the same arguments and returns the same mapping."""
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // 4)
+    options.setdefault('threads', BATCH_THREADS_PER_JOB)
+
+    # Missing files sort last; repair_async() reports them.
+    jobs = sorted(paths, key=lambda path: os.path.getsize(path) if os.path.isfile(path) else -1, reverse=True)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_job(path):
+        async with semaphore:
+            return await repair_async(path, **options)
+
+    outputs = await asyncio.gather(*(run_job(path) for path in jobs))
+    return dict(zip(jobs, outputs))
+
+def repair_many(paths, workers=None, **options):
+    """
+    Repairs several video files in parallel.
+    Each job is an FFmpeg process limited to BATCH_THREADS_PER_JOB threads, and up to 'workers' of them run
+    at once under a single asyncio event loop. The largest files are started first (longest-processing-time-first),
+    which keeps the total run time close to that of the single biggest file.
+
+    Args:
+        paths (list): Paths of the potentially corrupt video files.
+        workers (int): Number of files repaired at the same time. Defaults to a quarter of the CPU cores.
+        **options: Passed on to repair_async() (mode, hwaccel, preset, ...).
+
+    Returns:
+        dict: Maps each input path to its repaired file, or to None if the repair failed.
+    """
+    results = asyncio.run(repair_many_async(paths, workers, **options))
+
+    print("=" * 70)
+    print(f"Batch finished: {sum(1 for output in results.values() if output)} of {len(results)} files repaired.")
+    for path, output in results.items():
+        print(f"{'✅' if output else '❌'} {path}")
+    print("=" * 70)
+    return results
+
 def main():
     """Main function to handle user input."""
+    parser = argparse.ArgumentParser(description="Repair a corrupt video file with FFmpeg.")
+    parser.add_argument(
+        'input_path',
+        nargs='?',
+        help="Path to the corrupt video file, or a directory to repair every video in it (prompted for if omitted)."
+    )
+    parser.add_argument(
+        '--mode',
+        choices=REPAIR_MODES,
+        default='auto',
+        help="Repair strategy. 'auto' tries a fast stream copy first and only re-encodes if that fails."
+    )
+    parser.add_argument(
+        '--hwaccel',
+        choices=['auto', 'cuda', 'vaapi', 'qsv', 'videotoolbox', 'none'],
+        default='auto',
+        help="Hardware encoder to use. 'auto' picks the first one available, 'none' forces CPU (libx264)."
+    )
+    parser.add_argument(
+        '--preset',
+        default='veryfast',
+        help="libx264 preset for CPU re-encoding (default: veryfast)."
+    )
+    parser.add_argument(
+        '--crf',
+        type=int,
+        default=20,
+        help="libx264 Constant Rate Factor for CPU re-encoding, lower is better quality (default: 20)."
+    )
+    parser.add_argument(
+        '--streamable',
+        action='store_true',
+        help="Write a regular MP4 with the index at the front for web streaming (slower, rewrites the whole file)."
+    )
+    parser.add_argument(
+        '--skip-existing',
+        action='store_true',
+        help="Skip files that already have a repaired copy newer than the original (useful to resume a batch)."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="Files repaired in parallel when a directory is given (default: a quarter of the CPU cores)."
+    )
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
     print("--- Video Corruption Repair Tool (FFmpeg Required) ---")
-    print("This tool attempts to fix video file corruption by remuxing the container.")
-    input_video_path = input("Please enter the full path to the video file (e.g., C:\\Videos\\corrupt.mp4 or /home/user/corrupt.mov): ")
-    
-    # Clean up the path (remove quotes if user pasted them)
-    input_video_path = input_video_path.strip().replace('"', '').replace("'", "")
-
-    if input_video_path:
-        repair_video(input_video_path)
+    print("This tool attempts to fix video file corruption by remuxing the container, re-encoding only if needed.")
+    if args.input_path:
+        input_video_path = args.input_path
+    else:
+        input_video_path = input("Please enter the full path to the video file (e.g., C:\\Videos\\corrupt.mp4 or /home/user/corrupt.mov): ")
+
+    # Clean up the path (remove surrounding quotes if user pasted them)
+    input_video_path = input_video_path.strip().strip('\'"')
+
+    options = {
+        'mode': args.mode,
+        'hwaccel': args.hwaccel,
+        'preset': args.preset,
+        'crf': args.crf,
+        'streamable': args.streamable,
+        'skip_existing': args.skip_existing,
+    }
+
+    if input_video_path and os.path.isdir(input_video_path):
+        videos = find_videos(input_video_path)
+        if videos:
+            repair_many(videos, workers=args.workers, **options)
+        else:
+            print(f"No {', '.join(BATCH_EXTENSIONS)} files found in '{input_video_path}'. Exiting.")
+    elif input_video_path:
+        repair_video(input_video_path, **options)
     else:
         print("No path provided. Exiting.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()